@@ -1,10 +1,15 @@
 """Provide the Streamlit UI for the Facebook action."""
 
+import time
+
 import streamlit as st
 from jvcli.client.lib.utils import call_action_walker_exec
 from jvcli.client.lib.widgets import app_controls, app_header, app_update_action
 from streamlit_router import StreamlitRouter
 
+# minimum seconds between webhook registration attempts, to absorb repeated clicks
+REGISTER_DEBOUNCE_SECONDS = 5
+
 
 def render(router: StreamlitRouter, agent_id: str, action_id: str, info: dict) -> None:
     """
@@ -33,13 +38,26 @@ def render(router: StreamlitRouter, agent_id: str, action_id: str, info: dict) -
             "This enables your agent to communicate with Facebook."
         )
 
+        registered_key = f"{model_key}_registered"
+        last_register_key = f"{model_key}_last_register_ts"
+
         # Register Webhook button
         if st.button("Register Webhook", key=f"{model_key}_btn_register_webhook"):
-            result = call_action_walker_exec(
-                agent_id, module_root, "register_session", {}
-            )
-
-            if result:
-                st.success("Webhook registered successfully!")
+            last_register = st.session_state.get(last_register_key, 0)
+            if last_register + REGISTER_DEBOUNCE_SECONDS > time.time():
+                st.info(
+                    "Webhook registration was just submitted. Please wait a moment."
+                )
             else:
-                st.error("Failed to register webhook. Please try again.")
+                st.session_state[last_register_key] = time.time()
+                result = call_action_walker_exec(
+                    agent_id, module_root, "register_session", {}
+                )
+                st.session_state[registered_key] = bool(result)
+
+                if not result:
+                    st.error("Failed to register webhook. Please try again.")
+
+        # keep showing the outcome on later reruns without registering again
+        if st.session_state.get(registered_key):
+            st.success("Webhook registered successfully!")
@@ -0,0 +1,311 @@
+"""This module provides the AsyncFacebookAPI class, an aiohttp-based variant of FacebookAPI for use in async handlers."""
+
+import asyncio
+import weakref
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+from .facebook_api import _MIME_CATEGORY, FacebookAPI, _json_dumps, _json_loads
+
+
+class AsyncFacebookAPI(FacebookAPI):
+    """
+    An asynchronous variant of FacebookAPI which issues Graph API calls through a shared
+    aiohttp client session, so concurrent calls are multiplexed on the event loop instead of
+    blocking a thread each.
+
+    Requires the optional aiohttp package, which is not installed with this action.
+    """
+
+    # aiohttp sessions are bound to the event loop they were created on, so one shared session
+    # is kept per loop; like FacebookAPI._session it outlives the per-call client instances
+    _aio_sessions: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def get_aio_session(cls) -> aiohttp.ClientSession:
+        """Returns the running loop's shared aiohttp session, creating it on first use."""
+        loop = asyncio.get_running_loop()
+        session = cls._aio_sessions.get(loop)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=100, limit_per_host=30, keepalive_timeout=30
+                ),
+            )
+            cls._aio_sessions[loop] = session
+        return session
+
+    @classmethod
+    async def aclose(cls) -> None:
+        """Closes the running loop's shared aiohttp session; a new one is created on next use."""
+        session = cls._aio_sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None:
+            await session.close()
+
+    async def send_rest_request_async(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict] = None,
+        data: Optional[Dict] = None,
+        headers: Optional[Dict] = None,
+        json_body: Optional[Dict] = None,
+    ) -> Any:
+        """Async counterpart of send_rest_request with the same standardized error handling."""
+        if endpoint.startswith("http://") or endpoint.startswith("https://"):
+            return await self._send_request_async(
+                method, endpoint, params, data, headers, json_body
+            )
+
+        url = f"{self.api_url}{endpoint}"
+        if params is None:
+            params = {}
+        if "access_token" in params:
+            return await self._send_request_async(
+                method, url, params, data, headers, json_body
+            )
+
+        token = self._cached_access_token()
+        if token is None:
+            # token inspection/refresh is blocking I/O, so keep it off the event loop
+            token = await asyncio.to_thread(self._fresh_access_token)
+        params["access_token"] = token
+        response = await self._send_request_async(
+            method, url, params, data, headers, json_body
+        )
+        if self._is_expired_token_error(response):
+            # the token was revoked or expired early; refresh once and retry
+            state = await asyncio.to_thread(self._refresh_access_token, True)
+            if state["access_token"] != params["access_token"]:
+                params["access_token"] = state["access_token"]
+                response = await self._send_request_async(
+                    method, url, params, data, headers, json_body
+                )
+        return response
+
+    async def _send_request_async(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict] = None,
+        data: Optional[Dict] = None,
+        headers: Optional[Dict] = None,
+        json_body: Optional[Dict] = None,
+    ) -> Any:
+        """Sends a single HTTP request to url and normalizes the response or error."""
+        body: Any = data
+        if json_body is not None:
+            body = _json_dumps(json_body)
+            headers = (
+                {**headers, **self._JSON_HEADERS} if headers else self._JSON_HEADERS
+            )
+
+        try:
+            async with self.get_aio_session().request(
+                method.upper(),
+                url,
+                params=params,
+                data=body,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            ) as response:
+                content = await response.read()
+                status, reason = response.status, response.reason
+                response_headers = response.headers
+        except asyncio.TimeoutError as e:
+            self.logger.error(f"Request timed out after {self.timeout} seconds: {e}")
+            return {"error": f"Timeout after {self.timeout} seconds"}
+        except aiohttp.ClientError as e:
+            self.logger.error(f"Request error: {str(e)}")
+            return {"error": str(e), "details": None}
+        except Exception as e:
+            self.logger.exception("Unexpected error")
+            return {"error": str(e)}
+
+        # throttling runs outside the error handling so it can never turn a success into a failure
+        if delay := self._usage_delay(response_headers):
+            await asyncio.sleep(delay)
+
+        if status >= 400:
+            self.logger.error(f"Request error: {status} {reason} for url: {url}")
+            try:
+                error_details = _json_loads(content) if content else None
+            except ValueError:
+                error_details = None
+            return {"error": f"{status} {reason}", "details": error_details}
+        try:
+            return _json_loads(content) if content else {}
+        except ValueError as e:
+            self.logger.exception("Unexpected error")
+            return {"error": str(e)}
+
+    async def send_text_message_async(self, recipient_id: str, message: str) -> Dict:
+        """Send text message to a Facebook user via Messenger."""
+        endpoint = self._messages_endpoint
+        data = {
+            "recipient": {"id": recipient_id},
+            "messaging_type": "RESPONSE",
+            "message": {"text": message},
+        }
+        return await self.send_rest_request_async("POST", endpoint, json_body=data)
+
+    async def send_media_async(
+        self,
+        recipient_id: str,
+        media_url: str,
+        media_type: str,
+    ) -> Dict:
+        """Send a media message (audio, image, video, or document) to a user via Messenger."""
+        endpoint = self._messages_endpoint
+        data = {
+            "recipient": {"id": recipient_id},
+            "messaging_type": "RESPONSE",
+            "message": {
+                "attachment": {
+                    "type": media_type,
+                    "payload": {"url": media_url, "is_reusable": True},
+                }
+            },
+        }
+        return await self.send_rest_request_async("POST", endpoint, json_body=data)
+
+    async def comment_on_post_async(self, post_id: str, message: str) -> Dict:
+        """Comments on a Facebook post."""
+        endpoint = f"{post_id}/comments"
+        params = {"message": message}
+        return await self.send_rest_request_async("POST", endpoint, params=params)
+
+    async def reply_to_comment_async(self, comment_id: str, message: str) -> Dict:
+        """Replies to a comment on a Facebook post."""
+        endpoint = f"{comment_id}/comments"
+        params = {"message": message}
+        return await self.send_rest_request_async("POST", endpoint, params=params)
+
+    async def post_message_to_page_async(self, message: str) -> Dict:
+        """Posts a message to a Facebook page."""
+        endpoint = self._feed_endpoint
+        params: Dict = {}
+        if not self.published:
+            params["published"] = "false"
+            params["unpublished_content_type"] = "DRAFT"
+        return await self.send_rest_request_async(
+            "POST", endpoint, params=params, json_body={"message": message}
+        )
+
+    async def _upload_media_batch_async(self, uploads: List[tuple]) -> List[str]:
+        """Uploads media via batched Graph API calls, sending all batch chunks concurrently."""
+        chunks = self._build_batch_chunks(uploads)
+        results = await asyncio.gather(
+            *[
+                self.send_rest_request_async(
+                    "POST",
+                    "",
+                    json_body={"batch": chunk, "include_headers": "false"},
+                )
+                for chunk in chunks
+            ]
+        )
+        return self._collect_batch_ids(results)
+
+    async def _post_attached_media_async(
+        self, caption: str, media_ids: List[str]
+    ) -> Dict:
+        """Publishes a feed post with the given uploaded media attached."""
+        endpoint = self._feed_endpoint
+        params: Dict = {}
+        if not self.published:
+            params["published"] = "false"
+            params["unpublished_content_type"] = "DRAFT"
+        json_data = {
+            "message": caption,
+            "attached_media": [{"media_fbid": _id} for _id in media_ids],
+        }
+        return await self.send_rest_request_async(
+            "POST", endpoint, params=params, json_body=json_data
+        )
+
+    async def post_images_to_page_async(
+        self, image_urls: List[str], caption: str
+    ) -> Dict:
+        """Uploads multiple photos to a Facebook page using URLs."""
+        uploads = []
+        for image_url in image_urls:
+            params = {"url": image_url}
+            if not self.published:
+                params["published"] = "false"
+                params["unpublished_content_type"] = "DRAFT"
+            uploads.append((self._photos_endpoint, params))
+
+        image_ids = await self._upload_media_batch_async(uploads)
+        if not image_ids:
+            return {"error": "Failed to upload any images"}
+        return await self._post_attached_media_async(caption, image_ids)
+
+    async def post_videos_to_page_async(
+        self, title: str, caption: str, video_urls: List[str]
+    ) -> Dict:
+        """Uploads multiple videos to a Facebook page using URLs."""
+        uploads = []
+        for video_url in video_urls:
+            params = {"title": title, "file_url": video_url}
+            if not self.published:
+                params["published"] = "false"
+                params["unpublished_content_type"] = "DRAFT"
+            uploads.append((self._videos_endpoint, params))
+
+        video_ids = await self._upload_media_batch_async(uploads)
+        if not video_ids:
+            return {"error": "Failed to upload any videos"}
+        return await self._post_attached_media_async(caption, video_ids)
+
+    async def get_mime_type_async(self, url: str) -> Optional[Dict]:
+        """Determine the MIME type of a URL and categorize it."""
+        detected_mime_type = self._mime_cache.get(url)
+        if detected_mime_type is None:
+            try:
+                async with self.get_aio_session().head(
+                    url,
+                    allow_redirects=True,
+                    timeout=aiohttp.ClientTimeout(total=self.timeout),
+                ) as response:
+                    detected_mime_type = response.headers.get("Content-Type")
+                    if response.ok and detected_mime_type:
+                        self._mime_cache.set(url, detected_mime_type)
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                return None
+
+        return {
+            "file_type": _MIME_CATEGORY.get(detected_mime_type or "", "unknown"),
+            "mime": detected_mime_type,
+        }
+
+    async def post_media_to_page_async(
+        self, caption: str, media_urls: List[Dict]
+    ) -> Dict:
+        """Posts media (images or videos) to a Facebook page using URLs."""
+        urls = [media["url"] for media in media_urls if media.get("url")]
+        mime_infos = await asyncio.gather(
+            *[self.get_mime_type_async(url) for url in urls]
+        )
+
+        uploads = []
+        for media_url, mime_info in zip(urls, mime_infos):
+            media_type = mime_info.get("file_type") if mime_info else None
+            if media_type == "video":
+                endpoint = self._videos_endpoint
+                params = {"file_url": media_url}
+            elif media_type == "image":
+                endpoint = self._photos_endpoint
+                params = {"url": media_url}
+            else:
+                continue
+            if not self.published:
+                params["published"] = "false"
+                params["unpublished_content_type"] = "DRAFT"
+            uploads.append((endpoint, params))
+
+        media_ids = await self._upload_media_batch_async(uploads)
+        if not media_ids:
+            return {"error": "No valid media uploaded"}
+        return await self._post_attached_media_async(caption, media_ids)
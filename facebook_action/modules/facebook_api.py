@@ -1,14 +1,92 @@
 """This module provides the FacebookAPI class for interacting with the Facebook Graph API."""
 
+import hmac
+import itertools
+import json
 import logging
 import mimetypes
-import random
-import string
-import traceback
-from typing import Any, Dict, List, Optional, Union
+import secrets
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+from urllib.parse import urlencode
 
 import requests
 from jvserve.lib.file_interface import file_interface
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+try:
+    import orjson
+except ImportError:  # orjson is an optional speedup
+    orjson = None  # type: ignore[assignment]
+
+# supported MIME types mapped to the media category used when sending or posting them
+_MIME_CATEGORY = {
+    "image/jpeg": "image",
+    "image/png": "image",
+    "image/gif": "image",
+    "image/webp": "image",
+    "application/pdf": "document",
+    "text/plain": "document",
+    "audio/mpeg": "audio",
+    "audio/wav": "audio",
+    "video/mp4": "video",
+    "video/quicktime": "video",
+}
+
+
+def _json_dumps(obj: Any) -> bytes:
+    """Serializes obj to UTF-8 JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
+def _json_loads(content: Union[bytes, str]) -> Any:
+    """Parses JSON content, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+class _TTLCache:
+    """A small thread-safe cache whose entries expire after a fixed time-to-live."""
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        """
+        Initializes the cache.
+
+        :param maxsize: Maximum number of entries kept; the oldest entry is evicted first.
+        :param ttl: Time-to-live of each entry in seconds.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: Dict[Any, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        """Returns the cached value for key, or default if it is missing or expired."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            return value
+
+    def set(self, key: Any, value: Any) -> None:
+        """Stores value under key, evicting the oldest entry when the cache is full."""
+        with self._lock:
+            self._data.pop(key, None)
+            if len(self._data) >= self.maxsize:
+                del self._data[next(iter(self._data))]
+            self._data[key] = (time.monotonic() + self.ttl, value)
 
 
 class FacebookAPI:
@@ -18,6 +96,37 @@ class FacebookAPI:
     """
 
     logger = logging.getLogger(__name__)
+    # request headers for JSON bodies; shared read-only, never mutated
+    _JSON_HEADERS = {"Content-Type": "application/json"}
+    # maximum number of sub-requests the Graph API accepts in a single batch call
+    BATCH_LIMIT = 50
+    # storage prefix for files downloaded from Facebook
+    _FB_PREFIX = "fb/"
+    # maximum number of concurrent requests issued when fanning out independent calls
+    MAX_WORKERS = 8
+    # HTTP session shared by all instances; the action builds a new FacebookAPI per call
+    # so pooled keep-alive connections must outlive any single instance
+    _session: Optional[requests.Session] = None
+    _session_lock = threading.Lock()
+    # Content-Type of remote media URLs, keyed by URL
+    _mime_cache = _TTLCache(maxsize=1024, ttl=3600)
+    # near-static page and user metadata, keyed by lookup and access token
+    _meta_cache = _TTLCache(maxsize=128, ttl=300)
+    # post permalinks never change, so they are kept for longer
+    _permalink_cache = _TTLCache(maxsize=1024, ttl=3600)
+    # calls currently in progress, keyed by operation; concurrent duplicates share one result
+    _inflight: Dict[str, Future] = {}
+    _inflight_lock = threading.Lock()
+    # usage percentage reported by Graph API rate-limit headers above which calls are slowed down
+    USAGE_THRESHOLD = 90
+    # number of consecutive responses reporting usage above USAGE_THRESHOLD
+    _consecutive_throttle = 0
+    # seconds before expiry at which an access token is proactively refreshed
+    TOKEN_REFRESH_MARGIN = 300
+    # Graph API error code for an invalid or expired access token
+    EXPIRED_TOKEN_CODE = 190
+    # current access token and its expiry (0 if it never expires), keyed by the configured token
+    _token_state: Dict[str, Dict] = {}
 
     def __init__(
         self,
@@ -48,10 +157,103 @@ class FacebookAPI:
         self.app_id = app_id
         self.page_id = page_id
         self.access_token = access_token
+        # the token as configured on the action; refreshed tokens are tracked against it
+        self._configured_token = access_token
         self.verify_token = verify_token
         self.fields = fields
         self.timeout = timeout
         self.published = published
+        # page-scoped endpoints used on every send/post, built once per instance
+        self._messages_endpoint = f"{page_id}/messages"
+        self._feed_endpoint = f"{page_id}/feed"
+        self._photos_endpoint = f"{page_id}/photos"
+        self._videos_endpoint = f"{page_id}/videos"
+        self._posts_endpoint = f"{page_id}/posts"
+        self._accounts_endpoint = "me/accounts"
+
+    @classmethod
+    def get_session(cls) -> requests.Session:
+        """Returns the shared HTTP session, creating it with connection pooling and retries on first use."""
+        session = cls._session
+        if session is None:
+            with cls._session_lock:
+                session = cls._session
+                if session is None:
+                    session = requests.Session()
+                    retries = Retry(
+                        total=5,
+                        # a read error on a POST may follow an accepted write; never resend it
+                        read=0,
+                        backoff_factor=0.5,
+                        status_forcelist=[429, 500, 502, 503, 504],
+                        allowed_methods=["GET", "POST", "HEAD"],
+                        respect_retry_after_header=True,
+                        # hand the final error response back so its details can be logged
+                        raise_on_status=False,
+                    )
+                    session.mount(
+                        "https://",
+                        HTTPAdapter(
+                            pool_connections=10, pool_maxsize=20, max_retries=retries
+                        ),
+                    )
+                    cls._session = session
+        return session
+
+    @classmethod
+    def close(cls) -> None:
+        """Closes the shared HTTP session; a fresh one is created on the next request."""
+        with cls._session_lock:
+            if cls._session is not None:
+                cls._session.close()
+                cls._session = None
+
+    @classmethod
+    def _usage_delay(cls, headers: Any) -> float:
+        """Returns the backoff delay in seconds warranted by the Graph API usage headers, if any."""
+        call_count: float = 0
+        for header in ("X-App-Usage", "X-Business-Use-Case-Usage"):
+            raw = headers.get(header)
+            if not raw:
+                continue
+            try:
+                usage = json.loads(raw)
+            except ValueError:
+                continue
+            if not isinstance(usage, dict):
+                continue
+            if header == "X-App-Usage":
+                entries = [usage]
+            else:
+                # business use case usage is keyed by business ID, each holding a list of usage entries
+                entries = [
+                    entry
+                    for value in usage.values()
+                    if isinstance(value, list)
+                    for entry in value
+                ]
+            for entry in entries:
+                count = entry.get("call_count") if isinstance(entry, dict) else None
+                if isinstance(count, (int, float)):
+                    call_count = max(call_count, count)
+
+        if call_count <= cls.USAGE_THRESHOLD:
+            cls._consecutive_throttle = 0
+            return 0
+
+        cls._consecutive_throttle += 1
+        delay = min(2**cls._consecutive_throttle, 60)
+        cls.logger.warning(
+            f"Facebook API usage at {call_count}%, backing off for {delay} seconds"
+        )
+        return delay
+
+    @classmethod
+    def _usage_backoff(cls, headers: Any) -> None:
+        """Sleeps with exponential backoff while Graph API usage headers report near-limit usage."""
+        delay = cls._usage_delay(headers)
+        if delay:
+            time.sleep(delay)
 
     def send_rest_request(
         self,
@@ -64,50 +266,289 @@ class FacebookAPI:
     ) -> Dict:
         """Centralized method to send HTTP requests with standardized error handling."""
         if endpoint.startswith("http://") or endpoint.startswith("https://"):
-            url = endpoint
-        else:
-            url = f"{self.api_url}{endpoint}"
+            return self._send_request(
+                method, endpoint, params, data, headers, json_body
+            )
+
+        url = f"{self.api_url}{endpoint}"
+        # authenticate Graph API calls with the page token unless the caller supplied its own
+        if params is None:
+            params = {}
+        if "access_token" in params:
+            return self._send_request(method, url, params, data, headers, json_body)
+
+        params["access_token"] = self._fresh_access_token()
+        response = self._send_request(method, url, params, data, headers, json_body)
+        if self._is_expired_token_error(response):
+            # the token was revoked or expired early; refresh once and retry
+            state = self._refresh_access_token(force=True)
+            if state["access_token"] != params["access_token"]:
+                params["access_token"] = state["access_token"]
+                response = self._send_request(
+                    method, url, params, data, headers, json_body
+                )
+        return response
+
+    def _send_request(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict] = None,
+        data: Optional[Dict] = None,
+        headers: Optional[Dict] = None,
+        json_body: Optional[Dict] = None,
+    ) -> Dict:
+        """Sends a single HTTP request to url and normalizes the response or error."""
+        body: Any = data
+        if json_body is not None:
+            body = _json_dumps(json_body)
+            headers = (
+                {**headers, **self._JSON_HEADERS} if headers else self._JSON_HEADERS
+            )
 
         try:
-            response = requests.request(
+            response = self.get_session().request(
                 method=method.upper(),
                 url=url,
                 params=params,
-                data=data,
-                json=json_body,
+                data=body,
                 headers=headers,
                 timeout=self.timeout,
             )
+        except Exception as e:
+            return self._request_error(e)
+
+        # throttling runs outside the error handling so it can never turn a success into a failure
+        self._usage_backoff(response.headers)
+
+        try:
             response.raise_for_status()
-            return response.json() if response.content else {}
-        except requests.Timeout as e:
+            return _json_loads(response.content) if response.content else {}
+        except Exception as e:
+            return self._request_error(e)
+
+    def _request_error(self, e: Exception) -> Dict:
+        """Logs a failed request and converts the exception into a standardized error dict."""
+        if isinstance(e, requests.Timeout):
             self.logger.error(f"Request timed out after {self.timeout} seconds: {e}")
             return {"error": f"Timeout after {self.timeout} seconds"}
-        except requests.RequestException as e:
+        if isinstance(e, requests.RequestException):
             self.logger.error(f"Request error: {str(e)}")
-            error_details = (
-                e.response.json() if e.response and e.response.content else None
-            )
+            error_details = None
+            if e.response is not None and e.response.content:
+                try:
+                    error_details = _json_loads(e.response.content)
+                except ValueError:
+                    pass
             return {"error": str(e), "details": error_details}
-        except Exception as e:
-            self.logger.error(f"Unexpected error: {traceback.format_exc()}")
-            return {"error": str(e)}
+        self.logger.exception("Unexpected error")
+        return {"error": str(e)}
+
+    @classmethod
+    def _is_expired_token_error(cls, response: Any) -> bool:
+        """Returns True if response is a Graph API OAuthException for an invalid or expired token."""
+        if not isinstance(response, dict) or "error" not in response:
+            return False
+        details = response.get("details")
+        if not isinstance(details, dict):
+            return False
+        error = details.get("error")
+        return isinstance(error, dict) and error.get("code") == cls.EXPIRED_TOKEN_CODE
+
+    def _cached_access_token(self) -> Optional[str]:
+        """Returns the current page access token if it is known and fresh without any network I/O, else None."""
+        if not (self.app_id and self.app_secret):
+            # token introspection and exchange both need the app credentials
+            return self.access_token
+
+        state = self._token_state.get(self._configured_token)
+        if state is None:
+            return None
+        expires_at = state["expires_at"]
+        if expires_at and time.time() > expires_at - self.TOKEN_REFRESH_MARGIN:
+            return None
+
+        self.access_token = state["access_token"]
+        return self.access_token
+
+    def _fresh_access_token(self) -> str:
+        """Returns the current page access token, refreshing it first if it is about to expire."""
+        token = self._cached_access_token()
+        if token is not None:
+            return token
+
+        state = self._token_state.get(self._configured_token)
+        if state is None:
+            state = self._single_flight(
+                f"debug:{self._configured_token}", self._inspect_access_token
+            )
+        expires_at = state["expires_at"]
+        if expires_at and time.time() > expires_at - self.TOKEN_REFRESH_MARGIN:
+            state = self._refresh_access_token()
+
+        self.access_token = state["access_token"]
+        return self.access_token
+
+    def _inspect_access_token(self) -> Dict:
+        """Looks up the configured token's expiry via /debug_token and records it."""
+        state = self._token_state.get(self._configured_token)
+        if state is not None:
+            return state
+
+        response = self._send_request(
+            "GET",
+            f"{self.api_url}debug_token",
+            params={
+                "input_token": self._configured_token,
+                "access_token": f"{self.app_id}|{self.app_secret}",
+            },
+        )
+        if "error" in response:
+            self.logger.error(
+                f"Facebook API: Unable to inspect access token: {response['error']}"
+            )
+        # an expires_at of 0 means the token never expires
+        expires_at = float(response.get("data", {}).get("expires_at") or 0)
+        state = {"access_token": self._configured_token, "expires_at": expires_at}
+        self._token_state[self._configured_token] = state
+        return state
+
+    def _refresh_access_token(self, force: bool = False) -> Dict:
+        """Exchanges the current token for a fresh long-lived one; concurrent callers share one refresh."""
+        return self._single_flight(
+            f"refresh:{self._configured_token}",
+            lambda: self._exchange_access_token(force),
+        )
+
+    def _exchange_access_token(self, force: bool) -> Dict:
+        """Performs the fb_exchange_token call and records the new token and its expiry."""
+        state = self._token_state.get(self._configured_token) or {
+            "access_token": self.access_token,
+            "expires_at": 0.0,
+        }
+        expires_at = state["expires_at"]
+        if not force and not (
+            expires_at and time.time() > expires_at - self.TOKEN_REFRESH_MARGIN
+        ):
+            # another caller refreshed the token while this one waited
+            return state
+        if not (self.app_id and self.app_secret):
+            return state
+
+        response = self._send_request(
+            "GET",
+            f"{self.api_url}oauth/access_token",
+            params={
+                "grant_type": "fb_exchange_token",
+                "client_id": self.app_id,
+                "client_secret": self.app_secret,
+                "fb_exchange_token": state["access_token"],
+            },
+        )
+        if "access_token" not in response:
+            self.logger.error(
+                f"Facebook API: Unable to refresh access token: {response.get('error')}"
+            )
+            # stop proactive attempts; an expired-token error will trigger another refresh
+            state = {**state, "expires_at": 0.0}
+        else:
+            expires_in = response.get("expires_in")
+            state = {
+                "access_token": response["access_token"],
+                "expires_at": time.time() + float(expires_in) if expires_in else 0.0,
+            }
+        self._token_state[self._configured_token] = state
+        return state
+
+    @classmethod
+    def _single_flight(cls, key: str, func: Callable[[], Any]) -> Any:
+        """Runs func once for concurrent callers using the same key and hands them all its result."""
+        with cls._inflight_lock:
+            inflight = cls._inflight.get(key)
+            if inflight is None:
+                future: Future = Future()
+                cls._inflight[key] = future
+        if inflight is not None:
+            result = inflight.result()
+            # followers get their own copy so no caller can mutate another's result
+            return dict(result) if isinstance(result, dict) else result
+
+        try:
+            result = func()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with cls._inflight_lock:
+                cls._inflight.pop(key, None)
+
+    def _batch_request(self, requests_list: List[Dict]) -> Union[List, Dict]:
+        """Sends a list of sub-requests to the Graph API batch endpoint in a single call."""
+        data = {"batch": requests_list, "include_headers": "false"}
+        return self.send_rest_request("POST", "", json_body=data)
+
+    def _build_batch_chunks(self, uploads: Iterable[tuple]) -> List[List[Dict]]:
+        """Converts (endpoint, params) upload tuples into batch sub-requests grouped by BATCH_LIMIT."""
+        uploads = iter(uploads)
+        chunks = []
+        while chunk := list(itertools.islice(uploads, self.BATCH_LIMIT)):
+            chunks.append(
+                [
+                    {
+                        "method": "POST",
+                        "relative_url": f"{endpoint}?{urlencode(params)}",
+                    }
+                    for endpoint, params in chunk
+                ]
+            )
+        return chunks
+
+    def _collect_batch_ids(self, results: Iterable[Union[List, Dict]]) -> List[str]:
+        """Extracts the created object IDs, in order, from batch endpoint responses."""
+        media_ids = []
+        for responses in results:
+            if not isinstance(responses, list):
+                self.logger.error(f"Facebook API: Batch upload failed: {responses}")
+                continue
+            for response in responses:
+                # failed or timed out sub-requests come back as null or non-200 entries
+                if not response or response.get("code") != 200:
+                    continue
+                body = _json_loads(response.get("body") or "{}")
+                if "id" in body:
+                    media_ids.append(body["id"])
+        return media_ids
+
+    def _upload_media_batch(self, uploads: Iterable[tuple]) -> List[str]:
+        """Uploads media via batched Graph API calls and returns the created media IDs in order.
+
+        :param uploads: Iterable of (endpoint, params) tuples, one per media item.
+        """
+        chunks = self._build_batch_chunks(uploads)
+        if len(chunks) > 1:
+            with ThreadPoolExecutor(
+                max_workers=min(self.MAX_WORKERS, len(chunks))
+            ) as executor:
+                results = list(executor.map(self._batch_request, chunks))
+        else:
+            results = [self._batch_request(chunk) for chunk in chunks]
+        return self._collect_batch_ids(results)
 
     def parse_verification_request(self, request: Dict) -> Union[str, Dict[Any, Any]]:
         """Parses verification request payload and returns the challenge value if the token is valid."""
-        try:
-            hub_mode = request.get("hub.mode")
-            hub_verify_token = request.get("hub.verify_token")
-            hub_challenge = request.get("hub.challenge")
+        if request.get("hub.mode") != "subscribe":
+            return {"message": "Invalid token or mode", "code": 403}
 
-            if hub_verify_token == self.verify_token and hub_mode == "subscribe":
-                return hub_challenge if hub_challenge is not None else ""
+        # constant-time comparison so the token cannot be probed through response timing
+        hub_verify_token = str(request.get("hub.verify_token") or "")
+        if not hmac.compare_digest(
+            hub_verify_token.encode(), str(self.verify_token).encode()
+        ):
             return {"message": "Invalid token or mode", "code": 403}
-        except Exception as e:
-            self.logger.error(
-                f"Unable to process verification request: {traceback.format_exc()}"
-            )
-            return {"error": str(e)}
+
+        return request.get("hub.challenge") or ""
 
     def register_session(self, webhook_url: str) -> Dict:
         """Update Facebook webhook."""
@@ -120,49 +561,50 @@ class FacebookAPI:
             "verify_token": self.verify_token,
             "include_values": "true",
         }
-        return self.send_rest_request("POST", endpoint, params=params, json_body=data)
+        return self._single_flight(
+            f"register_session:{self.app_id}:{webhook_url}",
+            lambda: self.send_rest_request(
+                "POST", endpoint, params=params, json_body=data
+            ),
+        )
 
     @staticmethod
     def parse_inbound_message(request: Dict) -> Dict:
         """Parses message request payload and returns extracted values."""
-        payload = {}
         try:
             entry = request["entry"][0]
-            page_id = entry["id"]
-            sender_id = ""
-            message_type = ""
-            message = ""
             sender_name = ""
             attachments = []
-            caption = ""
-            parent_message_id = ""
-
-            if "changes" in entry:
-                change = entry["changes"][0]["value"]
-                sender_id = change["from"]["id"]
-                sender_name = change["from"]["name"]
-                message_type = change["item"]
+
+            if changes := entry.get("changes"):
+                change = changes[0].get("value", {})
+                sender = change.get("from", {})
+                sender_id = sender.get("id", "")
+                sender_name = sender.get("name", "")
+                message_type = change.get("item", "")
                 message = change.get("message") or change.get("reaction_type")
-            elif "messaging" in entry:
-                messaging = entry["messaging"][0]
-                sender_id = messaging["sender"]["id"]
+            elif messaging := entry.get("messaging"):
+                # events without a message body (e.g. delivery/read receipts) raise KeyError
+                inbound = messaging[0]["message"]
+                sender_id = messaging[0].get("sender", {}).get("id", "")
                 message_type = "message"
-                message = messaging["message"].get("text")
-                attachments = messaging["message"].get("attachments", [])
+                message = inbound.get("text")
+                attachments = inbound.get("attachments", [])
+            else:
+                sender_id = message_type = message = ""
 
-            payload = {
+            return {
                 "sender_name": sender_name,
                 "sender_id": sender_id,
-                "page_id": page_id,
+                "page_id": entry["id"],
                 "message_type": message_type,
                 "message": message,
                 "attachments": attachments,
-                "caption": caption,
+                "caption": "",
                 "data": request,
-                "parent_message_id": parent_message_id,
+                "parent_message_id": "",
             }
-            return payload
-        except Exception as e:
+        except (KeyError, IndexError, TypeError, AttributeError) as e:
             FacebookAPI.logger.error(
                 f"Facebook API: Error processing inbound message: {e}"
             )
@@ -170,17 +612,13 @@ class FacebookAPI:
 
     def send_text_message(self, recipient_id: str, message: str) -> Dict:
         """Send text message to a Facebook user via Messenger."""
-        endpoint = f"{self.page_id}/messages"
-        headers = {"Content-Type": "application/json"}
+        endpoint = self._messages_endpoint
         data = {
             "recipient": {"id": recipient_id},
             "messaging_type": "RESPONSE",
             "message": {"text": message},
         }
-        params = {"access_token": self.access_token}
-        return self.send_rest_request(
-            "POST", endpoint, headers=headers, json_body=data, params=params
-        )
+        return self.send_rest_request("POST", endpoint, json_body=data)
 
     def send_media(
         self,
@@ -189,8 +627,7 @@ class FacebookAPI:
         media_type: str,
     ) -> Dict:
         """Send a media message (audio, image, video, or document) to a user via Messenger."""
-        endpoint = f"{self.page_id}/messages"
-        headers = {"Content-Type": "application/json"}
+        endpoint = self._messages_endpoint
         data = {
             "recipient": {"id": recipient_id},
             "messaging_type": "RESPONSE",
@@ -201,37 +638,47 @@ class FacebookAPI:
                 }
             },
         }
-        params = {"access_token": self.access_token}
-        return self.send_rest_request(
-            "POST", endpoint, headers=headers, json_body=data, params=params
-        )
+        return self.send_rest_request("POST", endpoint, json_body=data)
 
     def get_user_info(self, fields: str = "id,name") -> Dict:
         """Fetches user information from the Facebook Graph API."""
+        key = ("me", self.access_token, fields)
+        cached = self._meta_cache.get(key)
+        if cached is not None:
+            return dict(cached)
+
         endpoint = "me"
-        params = {"fields": fields, "access_token": self.access_token}
-        return self.send_rest_request("GET", endpoint, params=params)
+        params = {"fields": fields}
+        response = self.send_rest_request("GET", endpoint, params=params)
+        if "error" not in response:
+            self._meta_cache.set(key, dict(response))
+        return response
+
+    def iter_all_pages(self, limit: int = 100) -> Iterator[Dict]:
+        """Yields the pages managed by the user, fetching further result pages only as they are consumed."""
+        endpoint = self._accounts_endpoint
+        params: Dict = {"limit": limit}
+
+        while True:
+            response = self.send_rest_request("GET", endpoint, params=params)
+            if "error" in response:
+                self.logger.error(
+                    f"Facebook API: Error listing pages: {response['error']}"
+                )
+                return
+            yield from response.get("data", [])
+            next_page = response.get("paging", {}).get("next")
+            if not next_page:
+                return
+            # the next link already carries the access token and cursor
+            endpoint = next_page
+            params = {}
 
     def list_all_pages(self, limit: int = 100) -> Union[List, Dict]:
         """Lists all pages managed by the user."""
 
         try:
-            all_pages = []
-            endpoint = "me/accounts"
-            params = {"access_token": self.access_token, "limit": limit}
-
-            while True:
-                response = self.send_rest_request("GET", endpoint, params=params)
-                if "error" in response:
-                    return []
-                all_pages.extend(response.get("data", []))
-                paging = response.get("paging", {})
-                next_page = paging.get("next")
-                if not next_page:
-                    break
-                endpoint = next_page
-                params = {}
-            return all_pages
+            return list(self.iter_all_pages(limit))
         except Exception as e:
             self.logger.error(f"Facebook API: Error listing pages: {e}")
             return {"ok": False, "error": str(e)}
@@ -241,61 +688,66 @@ class FacebookAPI:
         fields: str = "id,name,about,fan_count,access_token",
     ) -> Dict:
         """Fetches details of a Facebook page."""
+        key = ("page", self.page_id, self.access_token, fields)
+        cached = self._meta_cache.get(key)
+        if cached is not None:
+            return dict(cached)
+
         endpoint = self.page_id
-        params = {"fields": fields, "access_token": self.access_token}
-        return self.send_rest_request("GET", endpoint, params=params)
+        params = {"fields": fields}
+        response = self.send_rest_request("GET", endpoint, params=params)
+        if "error" not in response:
+            self._meta_cache.set(key, dict(response))
+        return response
 
     def post_message_to_page(self, message: str) -> Dict:
         """Posts a message to a Facebook page."""
-        endpoint = f"{self.page_id}/feed"
-        headers = {"Content-Type": "application/json"}
+        endpoint = self._feed_endpoint
         json_data = {"message": message}
-        params = {"access_token": self.access_token}
+        params: Dict = {}
         if not self.published:
             params["published"] = "false"
             params["unpublished_content_type"] = "DRAFT"
         return self.send_rest_request(
-            "POST", endpoint, headers=headers, json_body=json_data, params=params
+            "POST", endpoint, json_body=json_data, params=params
         )
 
     def get_page_posts(self, limit: int = 10) -> Union[List, Dict]:
         """Retrieves posts from a Facebook page. Most recent post first."""
-        endpoint = f"{self.page_id}/posts"
-        params = {"access_token": self.access_token, "limit": limit}
+        endpoint = self._posts_endpoint
+        params = {"limit": limit}
         return self.send_rest_request("GET", endpoint, params=params)
 
     def get_single_post(self, post_id: str) -> Dict:
         """Retrieves a single post from a Facebook page by post ID."""
         endpoint = post_id
-        params = {"access_token": self.access_token}
-        return self.send_rest_request("GET", endpoint, params=params)
+        return self.send_rest_request("GET", endpoint)
 
     def comment_on_post(self, post_id: str, message: str) -> Dict:
         """Comments on a Facebook post."""
         endpoint = f"{post_id}/comments"
-        params = {"message": message, "access_token": self.access_token}
+        params = {"message": message}
         return self.send_rest_request("POST", endpoint, params=params)
 
     def post_images_to_page(self, image_urls: List[str], caption: str) -> Dict:
         """Uploads multiple photos to a Facebook page using URLs."""
 
         try:
-            image_ids = []
+            uploads = []
             for image_url in image_urls:
-                endpoint = f"{self.page_id}/photos"
-                params = {"access_token": self.access_token, "url": image_url}
+                endpoint = self._photos_endpoint
+                params = {"url": image_url}
                 if not self.published:
                     params["published"] = "false"
                     params["unpublished_content_type"] = "DRAFT"
-                response = self.send_rest_request("POST", endpoint, params=params)
-                if "error" not in response:
-                    image_ids.append(response.get("id"))
+                uploads.append((endpoint, params))
+            image_ids = self._upload_media_batch(uploads)
 
             if not image_ids:
                 return {"error": "Failed to upload any images"}
 
-            endpoint = f"{self.page_id}/feed"
-            params = {"access_token": self.access_token}
+            endpoint = self._feed_endpoint
+            params = {}
             if not self.published:
                 params["published"] = "false"
                 params["unpublished_content_type"] = "DRAFT"
@@ -315,26 +767,21 @@ class FacebookAPI:
     ) -> Dict:
         """Uploads multiple videos to a Facebook page using URLs."""
         try:
-            video_ids = []
+            uploads = []
             for video_url in video_urls:
-                endpoint = f"{self.page_id}/videos"
-                params = {
-                    "access_token": self.access_token,
-                    "title": title,
-                    "file_url": video_url,
-                }
+                endpoint = self._videos_endpoint
+                params = {"title": title, "file_url": video_url}
                 if not self.published:
                     params["published"] = "false"
                     params["unpublished_content_type"] = "DRAFT"
-                response = self.send_rest_request("POST", endpoint, params=params)
-                if "error" not in response:
-                    video_ids.append(response.get("id"))
+                uploads.append((endpoint, params))
+            video_ids = self._upload_media_batch(uploads)
 
             if not video_ids:
                 return {"error": "Failed to upload any videos"}
 
-            endpoint = f"{self.page_id}/feed"
-            params = {"access_token": self.access_token}
+            endpoint = self._feed_endpoint
+            params = {}
             if not self.published:
                 params["published"] = "false"
                 params["unpublished_content_type"] = "DRAFT"
@@ -349,8 +796,9 @@ class FacebookAPI:
             self.logger.error(f"Facebook API: Error posting videos: {e}")
             return {"ok": False, "error": str(e)}
 
-    @staticmethod
+    @classmethod
     def get_mime_type(
+        cls,
         file_path: Optional[str] = None,
         url: Optional[str] = None,
         mime_type: Optional[str] = None,
@@ -361,65 +809,57 @@ class FacebookAPI:
         if file_path:
             detected_mime_type, _ = mimetypes.guess_type(file_path)
         elif url:
-            try:
-                response = requests.head(url, allow_redirects=True)
-                detected_mime_type = response.headers.get("Content-Type")
-            except requests.RequestException:
-                return None
+            detected_mime_type = cls._mime_cache.get(url)
+            if detected_mime_type is None:
+                try:
+                    response = cls.get_session().head(url, allow_redirects=True)
+                    detected_mime_type = response.headers.get("Content-Type")
+                except requests.RequestException:
+                    return None
+                if response.ok and detected_mime_type:
+                    cls._mime_cache.set(url, detected_mime_type)
         else:
             detected_mime_type = mime_type
 
-        image_types = ["image/jpeg", "image/png", "image/gif", "image/webp"]
-        document_types = ["application/pdf", "text/plain"]
-        audio_types = ["audio/mpeg", "audio/wav"]
-        video_types = ["video/mp4", "video/quicktime"]
-
-        if detected_mime_type in image_types:
-            return {"file_type": "image", "mime": detected_mime_type}
-        elif detected_mime_type in document_types:
-            return {"file_type": "document", "mime": detected_mime_type}
-        elif detected_mime_type in audio_types:
-            return {"file_type": "audio", "mime": detected_mime_type}
-        elif detected_mime_type in video_types:
-            return {"file_type": "video", "mime": detected_mime_type}
-        else:
-            return {"file_type": "unknown", "mime": detected_mime_type}
+        return {
+            "file_type": _MIME_CATEGORY.get(detected_mime_type or "", "unknown"),
+            "mime": detected_mime_type,
+        }
 
     def post_media_to_page(self, caption: str, media_urls: List[Dict]) -> Dict:
         """Posts media (images or videos) to a Facebook page using URLs."""
 
         try:
 
-            media_ids = []
-            for media in media_urls:
-                media_url = media.get("url")
-                mime_info = self.get_mime_type(url=media_url)
+            urls = [media.get("url") for media in media_urls]
+            with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
+                mime_infos = list(
+                    executor.map(lambda url: self.get_mime_type(url=url), urls)
+                )
+
+            uploads = []
+            for media_url, mime_info in zip(urls, mime_infos):
                 media_type = mime_info.get("file_type") if mime_info else None
 
                 if media_type == "video":
-                    endpoint = f"{self.page_id}/videos"
-                    params = {
-                        "access_token": self.access_token,
-                        "file_url": media_url,
-                    }
+                    endpoint = self._videos_endpoint
+                    params = {"file_url": media_url}
                 elif media_type == "image":
-                    endpoint = f"{self.page_id}/photos"
-                    params = {"access_token": self.access_token, "url": media_url}
+                    endpoint = self._photos_endpoint
+                    params = {"url": media_url}
                 else:
                     continue
                 if not self.published:
                     params["published"] = "false"
                     params["unpublished_content_type"] = "DRAFT"
-
-                response = self.send_rest_request("POST", endpoint, params=params)
-                if "error" not in response:
-                    media_ids.append(response.get("id"))
+                uploads.append((endpoint, params))
+            media_ids = self._upload_media_batch(uploads)
 
             if not media_ids:
                 return {"error": "No valid media uploaded"}
 
-            endpoint = f"{self.page_id}/feed"
-            params = {"access_token": self.access_token}
+            endpoint = self._feed_endpoint
+            params = {}
             if not self.published:
                 params["published"] = "false"
                 params["unpublished_content_type"] = "DRAFT"
@@ -437,13 +877,13 @@ class FacebookAPI:
     def get_post_comments(self, post_id: str, limit: int = 10) -> Union[List, Dict]:
         """Retrieves comments on a Facebook post."""
         endpoint = f"{post_id}/comments"
-        params = {"access_token": self.access_token, "limit": limit}
+        params = {"limit": limit}
         return self.send_rest_request("GET", endpoint, params=params)
 
     def reply_to_comment(self, comment_id: str, message: str) -> Dict:
         """Replies to a comment on a Facebook post."""
         endpoint = f"{comment_id}/comments"
-        params = {"message": message, "access_token": self.access_token}
+        params = {"message": message}
         return self.send_rest_request("POST", endpoint, params=params)
 
     def reply_to_comment_with_attachment(
@@ -451,60 +891,63 @@ class FacebookAPI:
     ) -> Dict:
         """Replies to a comment with an attachment."""
         endpoint = f"{comment_id}/comments"
-        data = {"attachment_url": attachment_url, "access_token": self.access_token}
+        data = {"attachment_url": attachment_url}
         return self.send_rest_request("POST", endpoint, data=data)
 
     def update_comment(self, comment_id: str, message: str) -> Dict:
         """Updates a comment on a Facebook post."""
         endpoint = comment_id
-        data = {"message": message, "access_token": self.access_token}
+        data = {"message": message}
         return self.send_rest_request("POST", endpoint, data=data)
 
     def like_comment(self, comment_id: str) -> Dict:
         """Likes a comment on a Facebook post."""
         endpoint = f"{comment_id}/likes"
-        params = {"access_token": self.access_token}
-        return self.send_rest_request("POST", endpoint, params=params)
+        return self.send_rest_request("POST", endpoint)
 
     def get_reactions(self, post_id: str) -> Union[List, Dict]:
         """Retrieves reactions on a Facebook post."""
         endpoint = f"{post_id}/reactions"
-        params = {"access_token": self.access_token}
-        return self.send_rest_request("GET", endpoint, params=params)
+        return self.send_rest_request("GET", endpoint)
 
-    @staticmethod
-    def download_file(url: str) -> Optional[str]:
+    @classmethod
+    def download_file(cls, url: str) -> Optional[str]:
         """Download a file from a URL and save it. Returns a web-accessible URL."""
         try:
-            response = requests.head(url, allow_redirects=True)
-            content_type = response.headers.get("Content-Type", "")
-            extension = mimetypes.guess_extension(content_type.split(";")[0])
-            if not extension:
-                return None
-
-            filename = (
-                "".join(random.choices(string.ascii_lowercase + string.digits, k=10))
-                + extension
-            )
-            output_path = f"fb/{filename}"
-
-            response = requests.get(url, stream=True)
-            if response.status_code == 200:
-                file_bytes = bytearray()
-                for chunk in response.iter_content(chunk_size=1024):
-                    if chunk:
-                        file_bytes.extend(chunk)
-                file_interface.save_file(output_path, bytes(file_bytes))
+            with cls.get_session().get(url, stream=True) as response:
+                if response.status_code != 200:
+                    return None
+
+                # the headers arrive before the body, so no separate HEAD probe is needed
+                content_type = response.headers.get("Content-Type", "")
+                extension = mimetypes.guess_extension(content_type.split(";")[0])
+                if not extension:
+                    return None
+
+                filename = secrets.token_hex(7) + extension
+                output_path = cls._FB_PREFIX + filename
+
+                # spool the body to disk so memory stays flat while downloading large media
+                with tempfile.TemporaryFile() as tmp:
+                    # copy straight from the raw stream in 1 MiB reads, undoing any gzip/deflate encoding
+                    response.raw.decode_content = True
+                    shutil.copyfileobj(response.raw, tmp, length=1024 * 1024)
+                    tmp.seek(0)
+                    file_interface.save_file(output_path, tmp.read())
                 return file_interface.get_file_url(output_path)
-            return None
         except Exception:
             return None
 
     def share_facebook_post(self, post_id: str) -> Dict:
         """Fetches the permalink URL of a Facebook post."""
+        permalink_url = self._permalink_cache.get(post_id)
+        if permalink_url is not None:
+            return {"status": "success", "data": permalink_url}
+
         endpoint = post_id
-        params = {"fields": "permalink_url", "access_token": self.access_token}
+        params = {"fields": "permalink_url"}
         response = self.send_rest_request("GET", endpoint, params=params)
         if "permalink_url" in response:
+            self._permalink_cache.set(post_id, response["permalink_url"])
             return {"status": "success", "data": response["permalink_url"]}
         return {"status": "error", "message": response.get("error", "Unknown error")}